@@ -8,11 +8,14 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 
+from .config_flow import async_remove_stored_regions
 from .const import DOMAIN
 from .sensor import PGKSlupskCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
+PLATFORMS: tuple[str, ...] = ("sensor", "calendar", "button")
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Ustawienie integracji przy użyciu wpisu w konfiguracji."""
@@ -55,24 +58,28 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.error("Nie udało się zainicjalizować danych PGK Słupsk: %s", err)
         raise ConfigEntryNotReady from err
 
+    # Nocne harmonogramy koordynatora – wyłączane razem z wpisem
+    entry.async_on_unload(coordinator.async_start_schedules())
+
     # Zachowujemy koordynator w hass.data, żeby czujniki i kalendarz mogły go wykorzystać
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
     # Przekazanie platform do konfiguracji: sensory + kalendarz
-    await hass.config_entries.async_forward_entry_setups(entry, ["sensor", "calendar", "button"])
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Rozładowanie integracji."""
-    unload_ok = await hass.config_entries.async_unload_platforms(
-        entry, ["sensor", "calendar", "button"]
-        # jeśli w przyszłości dojdą inne platformy, dopisujemy je tutaj
-    )
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        bucket = hass.data.get(DOMAIN, {})
+        bucket.pop(entry.entry_id, None)
+        # Ostatni wpis usunięty – sprzątamy też klucz domeny
+        if not bucket:
+            hass.data.pop(DOMAIN, None)
 
     return unload_ok
 
@@ -80,7 +87,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Sprzątanie po usunięciu wpisu konfiguracji.
 
-    Usuwa powiązane pliki JSON i ETag dla danej instancji integracji.
+    Usuwa powiązane pliki JSON (wraz z ewentualnym .tmp) i ETag dla danej
+    instancji integracji, a po ostatnim wpisie także zapisaną listę regionów.
     """
     entry_id = entry.entry_id
 
@@ -88,15 +96,25 @@ async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     json_path = os.path.join(base_dir, f"pgk_slupsk_{entry_id}.json")
     etag_path = os.path.join(base_dir, f"pgk_slupsk_{entry_id}.etag")
 
-    for path in (json_path, etag_path):
+    await hass.async_add_executor_job(
+        _remove_files, entry_id, (json_path, f"{json_path}.tmp", etag_path)
+    )
+
+    # Usuwany wpis może być jeszcze na liście – pomijamy go
+    if not any(
+        other.entry_id != entry_id
+        for other in hass.config_entries.async_entries(DOMAIN)
+    ):
+        await async_remove_stored_regions(hass)
+
+
+def _remove_files(entry_id: str, paths: tuple[str, ...]) -> None:
+    """Usuń pliki cache (wywoływane w executorze – operacje na dysku blokują)."""
+    for path in paths:
         try:
-            if os.path.exists(path):
-                os.remove(path)
-                _LOGGER.debug(
-                    "PGK Słupsk: usunięto plik %s dla wpisu %s",
-                    path,
-                    entry_id,
-                )
+            os.unlink(path)
+        except FileNotFoundError:
+            continue
         except OSError as err:
             _LOGGER.warning(
                 "PGK Słupsk: nie udało się usunąć pliku %s dla wpisu %s: %s",
@@ -104,3 +122,9 @@ async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
                 entry_id,
                 err,
             )
+        else:
+            _LOGGER.debug(
+                "PGK Słupsk: usunięto plik %s dla wpisu %s",
+                path,
+                entry_id,
+            )
@@ -1,13 +1,13 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
 
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.device_registry import DeviceInfo, DeviceEntryType
 from homeassistant.helpers.entity import EntityCategory, generate_entity_id
+from homeassistant.util import dt as dt_util
 
 from .const import DOMAIN, DEVICE_NAME
 
@@ -25,11 +25,21 @@ async def async_setup_entry(
     integration_name = entry.title
     coordinator = hass.data[DOMAIN][entry_id]
 
+    # Wspólne urządzenie dla wszystkich przycisków – budowane raz
+    device_info = DeviceInfo(
+        identifiers={(DOMAIN, f"{entry_id}::service")},
+        name=DEVICE_NAME,
+        manufacturer="PGK Słupsk",
+        model=integration_name,
+        entry_type=DeviceEntryType.SERVICE,
+    )
+
     button_api = PGKSlupskRefreshButton(
         hass=hass,
         coordinator=coordinator,
         integration_name=integration_name,
         entry_id=entry_id,
+        device_info=device_info,
     )
 
     button_sensors = PGKSlupskSensorsRefreshButton(
@@ -37,10 +47,11 @@ async def async_setup_entry(
         coordinator=coordinator,
         integration_name=integration_name,
         entry_id=entry_id,
+        device_info=device_info,
     )
     
     button_cache = PGKSlupskClearCacheButton(
-        hass, coordinator, integration_name, entry_id
+        hass, coordinator, integration_name, entry_id, device_info
     )
 
     async_add_entities([button_api, button_sensors, button_cache])
@@ -62,9 +73,9 @@ class PGKSlupskRefreshButton(ButtonEntity):
         coordinator,
         integration_name: str,
         entry_id: str,
+        device_info: DeviceInfo,
     ) -> None:
 
-        self._hass = hass
         self._coordinator = coordinator
         self._entry_id = entry_id
         self._integration_name = integration_name
@@ -76,16 +87,10 @@ class PGKSlupskRefreshButton(ButtonEntity):
         self.entity_id = generate_entity_id(
             "button.{}",
             f"pgk_slupsk_{integration_name}_api_refresh",
-            hass=self._hass,
+            hass=hass,
         )
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{entry_id}::service")},
-            name=DEVICE_NAME,
-            manufacturer="PGK Słupsk",
-            model=integration_name,
-            entry_type=DeviceEntryType.SERVICE,
-        )
+        self._attr_device_info = device_info
 
     async def async_press(self) -> None:
         """Obsługa kliknięcia."""
@@ -109,9 +114,9 @@ class PGKSlupskSensorsRefreshButton(ButtonEntity):
         coordinator,
         integration_name: str,
         entry_id: str,
+        device_info: DeviceInfo,
     ) -> None:
 
-        self._hass = hass
         self._coordinator = coordinator
         self._entry_id = entry_id
         self._integration_name = integration_name
@@ -123,23 +128,19 @@ class PGKSlupskSensorsRefreshButton(ButtonEntity):
         self.entity_id = generate_entity_id(
             "button.{}",
             f"pgk_slupsk_{integration_name}_sensors_refresh",
-            hass=self._hass,
+            hass=hass,
         )
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{entry_id}::service")},
-            name=DEVICE_NAME,
-            manufacturer="PGK Słupsk",
-            model=integration_name,
-            entry_type=DeviceEntryType.SERVICE,
-        )
+        self._attr_device_info = device_info
 
     async def async_press(self) -> None:
         """Ręczne odświeżenie stanu wszystkich sensorów."""
         _LOGGER.info("Przycisk: ręczne odświeżenie sensorów PGK Słupsk (bez API)")
 
         # wołamy Twoją istniejącą logikę!
-        await self._coordinator._handle_sensors_midnight_refresh(datetime.now())
+        await self._coordinator._handle_sensors_midnight_refresh(
+            dt_util.now(), force=True
+        )
 
 # --------------------------------------------------
 # 3 — PRZYCISK: Wyczyść cache
@@ -150,9 +151,8 @@ class PGKSlupskClearCacheButton(ButtonEntity):
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_icon = "mdi:cached"
 
-    def __init__(self, hass, coordinator, integration_name, entry_id):
+    def __init__(self, hass, coordinator, integration_name, entry_id, device_info):
 
-        self._hass = hass
         self._coordinator = coordinator
 
         self._attr_name = "Wyczyść cache"
@@ -161,16 +161,10 @@ class PGKSlupskClearCacheButton(ButtonEntity):
         self.entity_id = generate_entity_id(
             "button.{}",
             f"pgk_slupsk_{integration_name}_clear_cache",
-            hass=self._hass,
+            hass=hass,
         )
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{entry_id}::service")},
-            name=DEVICE_NAME,
-            manufacturer="PGK Słupsk",
-            model=integration_name,
-            entry_type=DeviceEntryType.SERVICE,
-        )
+        self._attr_device_info = device_info
 
     async def async_press(self) -> None:
         _LOGGER.info("Przycisk: usuwanie cache PGK Słupsk")
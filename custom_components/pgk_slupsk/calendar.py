@@ -2,25 +2,30 @@
 
 from __future__ import annotations
 
+import bisect
 from datetime import date, datetime, time, timedelta
+from itertools import islice
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from homeassistant.components.calendar import (
     CalendarEntity,
     CalendarEvent,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import generate_entity_id
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.device_registry import DeviceInfo, DeviceEntryType
 from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, WASTE_TYPES, DEVICE_NAME
+from .const import DOMAIN, DEVICE_NAME
 
 _LOGGER = logging.getLogger(__name__)
 
+# Najdłuższe możliwe wydarzenie: cały dzień + godzina przy zmianie czasu
+MAX_EVENT_DURATION = timedelta(days=1, hours=1)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -28,15 +33,24 @@ async def async_setup_entry(
     async_add_entities,
 ) -> None:
     """Utwórz encję kalendarza dla danego wpisu konfiguracji."""
-    coordinator = hass.data[DOMAIN][entry.entry_id]
-    integration_name = entry.title or "PGK Słupsk"
     entry_id = entry.entry_id
+    integration_name = entry.title or "PGK Słupsk"
+    coordinator = hass.data[DOMAIN][entry_id]
+
+    device_info = DeviceInfo(
+        identifiers={(DOMAIN, f"{entry_id}::service")},
+        name=DEVICE_NAME,
+        manufacturer="PGK Słupsk",
+        model=integration_name,
+        entry_type=DeviceEntryType.SERVICE,
+    )
 
     entity = PGKSlupskCalendar(
         coordinator=coordinator,
         integration_name=integration_name,
         hass=hass,
         entry_id=entry_id,
+        device_info=device_info,
     )
 
     # async_add_entities([entity], update_before_add=True)
@@ -47,63 +61,64 @@ async def async_setup_entry(
 class PGKSlupskCalendar(CoordinatorEntity, CalendarEntity):
     """Encja kalendarza pokazująca wszystkie odbiory odpadów dla danej lokalizacji."""
 
+    _attr_icon = "mdi:calendar"
+
     def __init__(
         self,
         coordinator,
         integration_name: str,
         hass: HomeAssistant,
         entry_id: str,
+        device_info: DeviceInfo,
     ) -> None:
         super().__init__(coordinator)
         self._integration_name = integration_name
-        self._hass = hass
         self._entry_id = entry_id
 
         # Nazwa kalendarza w HA
         # self._name = f"{integration_name} - harmonogram odpadów"
-        self._name = "Harmonogram odpadów"
+        self._attr_name = "Harmonogram odpadów"
 
         # Stabilne unique_id – jedno na wpis
-        self._unique_id = f"{entry_id}_waste_calendar"
+        self._attr_unique_id = f"{entry_id}_waste_calendar"
 
         # ID encji kalendarza
         self.entity_id = generate_entity_id(
             "calendar.{}",
             f"pgk_slupsk_{integration_name}_harmonogram",
-            hass=self._hass,
+            hass=hass,
         )
 
         # Bieżące najbliższe wydarzenie (HA używa tego np. w kartach)
+        # wraz z chwilą jego zakończenia – wtedy trzeba wskazać kolejne
         self._event: Optional[CalendarEvent] = None
-        
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{entry_id}::service")},
-            name=DEVICE_NAME,
-            manufacturer="PGK Słupsk",
-            model=integration_name,
-            entry_type=DeviceEntryType.SERVICE,
-        )
+        self._event_end: Optional[datetime] = None
 
-    @property
-    def icon(self):
-        """Ikona kalendarza."""
-        return "mdi:calendar"
+        # Wygenerowane wydarzenia – budowane raz na dane z koordynatora
+        self._cached_events: Optional[
+            List[Tuple[CalendarEvent, datetime, datetime]]
+        ] = None
+        # Początki wydarzeń z cache (ta sama kolejność) – do wyszukiwania binarnego
+        self._cached_starts: List[datetime] = []
+        self._cached_data_id: Optional[int] = None
 
-    @property
-    def name(self) -> str:
-        """Nazwa encji kalendarza."""
-        return self._name
+        # Strefa czasowa HA – nie zmienia się w trakcie życia encji
+        self._tz = dt_util.get_time_zone(hass.config.time_zone)
 
-    @property
-    def unique_id(self) -> str:
-        """Unikalny identyfikator encji."""
-        return self._unique_id
+        self._attr_device_info = device_info
+
+        # Koordynator ma już dane po pierwszym odświeżeniu w __init__.py
+        self._refresh_event()
 
     @property
     def event(self) -> Optional[CalendarEvent]:
-        """Zwróć najbliższe (lub trwające) wydarzenie."""
-        # Odświeżamy najbliższe zdarzenie na podstawie aktualnych danych
-        self._event = self._compute_next_event()
+        """Zwróć najbliższe (lub trwające) wydarzenie.
+
+        Wartość jest przeliczana przy nowych danych z koordynatora; tutaj
+        szukamy kolejnego wydarzenia tylko wtedy, gdy zapamiętane już minęło.
+        """
+        if self._event_end is None or self._event_end <= dt_util.now(self._tz):
+            self._refresh_event()
         return self._event
 
     async def async_update(self) -> None:
@@ -112,7 +127,14 @@ class PGKSlupskCalendar(CoordinatorEntity, CalendarEntity):
         NIE wywołujemy tutaj odświeżania koordynatora – dane dostarcza
         DataUpdateCoordinator, a my tylko przeliczamy najbliższe wydarzenie.
         """
-        self._event = self._compute_next_event()
+        self._refresh_event()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Nowe dane z koordynatora – przebuduj wydarzenia i najbliższe z nich."""
+        self._cached_events = None
+        self._refresh_event()
+        self.async_write_ha_state()
 
     async def async_get_events(
         self,
@@ -122,35 +144,19 @@ class PGKSlupskCalendar(CoordinatorEntity, CalendarEntity):
     ) -> List[CalendarEvent]:
         """Zwróć listę wydarzeń w zadanym przedziale czasu.
 
-        Obsługuje zarówno wydarzenia datetime, jak i całodniowe (date).
+        Porównanie odbywa się na przeliczonych wcześniej datetime ze strefą HA.
+        Wydarzenia są posortowane po starcie, więc zaczynamy od pierwszego,
+        które może jeszcze trwać w chwili start_date, i kończymy na end_date.
         """
         events = self._generate_all_events()
         result: List[CalendarEvent] = []
 
-        tz = dt_util.get_time_zone(self._hass.config.time_zone)
-
-        def _as_dt(value):
-            """Zamień date/datetime na datetime z prawidłową strefą."""
-            if isinstance(value, datetime):
-                if value.tzinfo is None:
-                    return value.replace(tzinfo=tz)
-                return value
-            if isinstance(value, date):
-                # wydarzenie całodniowe → początek dnia
-                return datetime.combine(value, time.min).replace(tzinfo=tz)
-            return None
-
-        for ev in events:
-            if ev.end is None:
-                continue
-
-            ev_start = _as_dt(ev.start)
-            ev_end = _as_dt(ev.end)
-            if ev_start is None or ev_end is None:
-                continue
-
+        lo = bisect.bisect_left(self._cached_starts, start_date - MAX_EVENT_DURATION)
+        for ev, ev_start, ev_end in islice(events, lo, None):
+            if ev_start >= end_date:
+                break
             # klasyczne sprawdzenie nakładania się zakresów
-            if ev_start < end_date and ev_end > start_date:
+            if ev_end > start_date:
                 result.append(ev)
 
         _LOGGER.debug(
@@ -165,95 +171,87 @@ class PGKSlupskCalendar(CoordinatorEntity, CalendarEntity):
     # Pomocnicze: generowanie wydarzeń z danych koordynatora
     # -------------------------------------------------------------------------
 
-    def _generate_all_events(self) -> List[CalendarEvent]:
+    def _generate_all_events(
+        self,
+    ) -> List[Tuple[CalendarEvent, datetime, datetime]]:
         """Wygeneruj wszystkie wydarzenia na podstawie danych z koordynatora.
 
         Każdy wpis (typ odpadu, data) -> wydarzenie całodniowe:
         - tytuł: nazwa odpadu jak w sensorach,
         - start: data odbioru (all-day),
         - koniec: dzień po dacie odbioru (all-day, otwarty interval [start, end)).
-        """
-        events: List[CalendarEvent] = []
 
+        Obok wydarzenia trzymamy jego początek i koniec jako datetime w strefie
+        HA, żeby nie przeliczać ich przy każdym zapytaniu. Wynik jest
+        zapamiętywany do czasu, aż koordynator dostarczy nowe dane.
+        """
         data: Dict[int, Dict[str, Any]] = self.coordinator.data or {}
-        if not data:
-            return events
-
-        for waste_type_id, waste_data in data.items():
-            waste_info = WASTE_TYPES.get(waste_type_id, {})
-            # dokładnie ta sama logika nazwy, co w sensorze:
-            title = f"{waste_info.get('name', waste_data.get('TypOdpadu', 'Odpady'))}"
-
-            for d_str in waste_data.get("Daty", []):
-                try:
-                    d_obj: date = datetime.strptime(d_str, "%Y-%m-%d").date()
-                except (ValueError, TypeError):
-                    continue
-
-                # Wydarzenie całodniowe:
-                # start = data odbioru, end = następny dzień
-                start_dt: date = d_obj
-                end_dt: date = d_obj + timedelta(days=1)
-
+        if self._cached_events is not None and id(data) == self._cached_data_id:
+            return self._cached_events
+
+        # Indeks data -> nazwy z koordynatora jest już posortowany po dacie,
+        # więc wydarzenia budujemy od razu w docelowej kolejności
+        by_date: Dict[date, List[str]] = self.coordinator.by_date
+
+        events: List[Tuple[CalendarEvent, datetime, datetime]] = []
+        tz = self._tz
+        description = f"{self._integration_name}"
+
+        for d_obj, titles in by_date.items():
+            # Wydarzenie całodniowe:
+            # start = data odbioru, end = następny dzień
+            start_dt: date = d_obj
+            end_dt: date = d_obj + timedelta(days=1)
+            start_tz = datetime.combine(start_dt, time.min, tzinfo=tz)
+            end_tz = datetime.combine(end_dt, time.min, tzinfo=tz)
+
+            for title in titles:
                 event = CalendarEvent(
                     summary=title,
                     start=start_dt,
                     end=end_dt,
-                    description=f"{self._integration_name}",
+                    description=description,
                 )
-                events.append(event)
+                events.append((event, start_tz, end_tz))
 
-        # Sortujemy po dacie początku
-        events.sort(key=lambda ev: ev.start or dt_util.now())
+        self._cached_events = events
+        self._cached_starts = [item[1] for item in events]
+        self._cached_data_id = id(data)
         return events
 
-    def _compute_next_event(self) -> Optional[CalendarEvent]:
+    def _refresh_event(self) -> None:
+        """Zapamiętaj najbliższe wydarzenie i moment jego zakończenia."""
+        found = self._compute_next_event()
+        if found is None:
+            self._event = None
+            self._event_end = None
+        else:
+            self._event, self._event_end = found
+
+    def _compute_next_event(self) -> Optional[Tuple[CalendarEvent, datetime]]:
         """Znajdź najbliższe nadchodzące LUB trwające wydarzenie.
 
-        Obsługuje zarówno wydarzenia datetime, jak i całodniowe (date).
+        Wydarzenia całodniowe porównujemy jako datetime w strefie HA.
         Dzięki temu:
         - all-day event „dzisiaj” będzie traktowany jako trwający,
         - stan encji kalendarza będzie 'on' w trakcie trwania wydarzenia.
+
+        Zwraca wydarzenie razem z jego końcem (datetime w strefie HA).
         """
         events = self._generate_all_events()
         if not events:
             return None
 
-        tz = dt_util.get_time_zone(self._hass.config.time_zone)
-        now = dt_util.now(tz)
-
-        def _as_dt(value: Any) -> Optional[datetime]:
-            if isinstance(value, datetime):
-                if value.tzinfo is None:
-                    return value.replace(tzinfo=tz)
-                return value
-            if isinstance(value, date):
-                return datetime.combine(value, time.min).replace(tzinfo=tz)
-            return None
+        now = dt_util.now(self._tz)
 
-        # Przygotuj listę (ev, start, end) tylko dla wydarzeń, które jeszcze się nie skończyły
-        prepared: List[tuple[CalendarEvent, datetime, datetime]] = []
-        for ev in events:
-            start_dt = _as_dt(ev.start)
-            end_raw = ev.end or ev.start
-            end_dt = _as_dt(end_raw)
-            if start_dt is None or end_dt is None:
-                continue
+        # Wydarzenia są posortowane po starcie, więc pierwsze niezakończone
+        # jest od razu właściwe: jeśli trwa, to zaczęło się najwcześniej
+        # ze wszystkich trwających; jeśli nie, to jest najbliższym przyszłym
+        # (trwające miałoby wcześniejszy start i zostałoby znalezione wcześniej).
+        for ev, _start_dt, end_dt in events:
             # interesują nas tylko te, które kończą się po "now"
             if end_dt <= now:
                 continue
-            prepared.append((ev, start_dt, end_dt))
-
-        if not prepared:
-            return None
-
-        # Najpierw spróbuj znaleźć wydarzenia trwające teraz
-        ongoing = [item for item in prepared if item[1] <= now < item[2]]
-        if ongoing:
-            # Jeśli jakieś trwa, wybierz to, które zaczęło się najwcześniej
-            ongoing_sorted = sorted(ongoing, key=lambda item: item[1])
-            return ongoing_sorted[0][0]
+            return ev, end_dt
 
-        # Jeśli żadne nie trwa, wybierz najbliższe przyszłe (najmniejszy start)
-        prepared_sorted = sorted(prepared, key=lambda item: item[1])
-        return prepared_sorted[0][0]
+        return None
@@ -1,9 +1,16 @@
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import aiohttp
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.json import json_bytes
+from homeassistant.helpers.storage import Store
+from homeassistant.util.json import json_loads
 
 from .const import DOMAIN
 
@@ -13,6 +20,35 @@ _LOGGER = logging.getLogger(__name__)
 TOKEN_URL = "https://pgkslupsk.pl/api/createToken"
 CMS_GRAPHQL_URL = "https://cms.pgkslupsk.pl/graphql"
 
+# Błędy sieci/API, po których flow pokazuje "cannot_connect" zamiast się wywracać
+_API_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ValueError)
+
+# ClientTimeout jest niemutowalny – jeden obiekt na wszystkie zapytania flow
+_DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=30)
+
+# Ostatnia poprawnie pobrana lista regionów (.storage) – awaryjnie, gdy CMS nie odpowiada
+REGIONS_STORE_VERSION = 1
+REGIONS_STORE_KEY = f"{DOMAIN}_regions"
+# Lista ostatnio zapisana w .storage (albo z niego wczytana) – porównujemy z nią
+# w pamięci, żeby po udanym pobraniu nie czytać pliku przy każdym flow
+_stored_regions: Optional[List[str]] = None
+
+# Token jest wspólny dla wszystkich flow – trzymamy go krótko w pamięci,
+# a równoległe prośby czekają na jedno zapytanie zamiast wysyłać własne
+TOKEN_MAX_AGE = 300  # 5 minut w sekundach
+_token_lock = asyncio.Lock()
+_token_cache: Optional[Tuple[str, float]] = None
+
+# Lista regionów zmienia się rzadko – kolejne flow przez godzinę biorą ją z pamięci
+REGIONS_MAX_AGE = 3600  # 1 godzina w sekundach
+_regions_lock = asyncio.Lock()
+_regions_cache: Optional[Tuple[List[str], float]] = None
+
+# Wyniki wyszukiwania lokalizacji: (region, fraza) -> (lista, czas pobrania)
+LOCATIONS_MAX_AGE = 300  # 5 minut w sekundach
+LOCATIONS_CACHE_SIZE = 128
+_locations_cache: Dict[Tuple[str, str], Tuple[List[str], float]] = {}
+
 HEADERS_BASE = {
     "User-Agent": "WebKit=Android",
     "Accept": "application/json",
@@ -46,23 +82,73 @@ query getLocations($regionName: String!, $searchTerm: String!) {
 """
 
 
+def _headers(token: Optional[str]) -> Dict[str, str]:
+    """Nagłówki zapytania – bez tokenu wspólny HEADERS_BASE (aiohttp go nie modyfikuje)."""
+    if not token:
+        return HEADERS_BASE
+    return HEADERS_BASE | {"Authorization": f"Bearer {token}"}
+
+
 async def _post_json(
     session: aiohttp.ClientSession,
     url: str,
     headers: Dict[str, str],
     payload: Any,
 ) -> Dict[str, Any]:
+    # Serializacja i parsowanie przez orjson (helpery HA) zamiast stdlib json;
+    # Content-Type: application/json jest już w nagłówkach
     async with session.post(
         url,
         headers=headers,
-        json=payload,
-        timeout=aiohttp.ClientTimeout(total=30),
+        data=json_bytes(payload),
+        timeout=_DEFAULT_TIMEOUT,
     ) as resp:
-        # API czasem zwraca z błędnym content-type, więc wymuszamy None
-        return await resp.json(content_type=None)
+        # API czasem zwraca z błędnym content-type, więc czytamy surowe bajty
+        raw = await resp.read()
+    if not raw.strip():
+        return {}
+    return json_loads(raw)
 
 
 async def _create_token(session: aiohttp.ClientSession) -> Optional[str]:
+    """Zwróć świeży token z pamięci albo pobierz nowy (jeden naraz)."""
+    global _token_cache
+
+    async with _token_lock:
+        if _token_cache and time.monotonic() - _token_cache[1] < TOKEN_MAX_AGE:
+            return _token_cache[0]
+
+        token = await _request_token(session)
+        if token:
+            _token_cache = (token, time.monotonic())
+        return token
+
+
+async def async_remove_stored_regions(hass: HomeAssistant) -> None:
+    """Usuń zapisaną listę regionów (.storage) – po usunięciu ostatniego wpisu."""
+    global _stored_regions
+
+    _stored_regions = None
+    await Store(hass, REGIONS_STORE_VERSION, REGIONS_STORE_KEY).async_remove()
+
+
+def _unauthenticated_result(result: Any, token: Optional[str], what: str) -> Any:
+    """Wynik zapytania bez tokenu z gather(return_exceptions=True).
+
+    _create_token nie rzuca wyjątków (zwraca None), więc sprawdzamy tylko
+    zapytanie: przy błędzie sieci/API i dostępnym tokenie zwracamy None,
+    żeby flow ponowił je z tokenem; bez tokenu (i dla innych wyjątków,
+    np. anulowania) wyjątek leci dalej.
+    """
+    if isinstance(result, BaseException):
+        if not token or not isinstance(result, _API_ERRORS):
+            raise result
+        _LOGGER.debug("PGK %s error without token, retrying with token: %s", what, result)
+        return None
+    return result
+
+
+async def _request_token(session: aiohttp.ClientSession) -> Optional[str]:
     try:
         data = await _post_json(session, TOKEN_URL, HEADERS_BASE, {})
         return (data or {}).get("token")
@@ -72,34 +158,51 @@ async def _create_token(session: aiohttp.ClientSession) -> Optional[str]:
 
 
 async def _fetch_regions(session: aiohttp.ClientSession, token: Optional[str]) -> List[str]:
-    headers = dict(HEADERS_BASE)
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
+    """Zwróć listę regionów z pamięci albo pobierz ją z CMS (jedno zapytanie naraz)."""
+    global _regions_cache
+
+    async with _regions_lock:
+        if _regions_cache and time.monotonic() - _regions_cache[1] < REGIONS_MAX_AGE:
+            return list(_regions_cache[0])
+
+        regions = await _query_regions(session, token)
+        if regions:
+            _regions_cache = (regions, time.monotonic())
+        return list(regions)
+
+
+async def _query_regions(session: aiohttp.ClientSession, token: Optional[str]) -> List[str]:
+    headers = _headers(token)
 
     payload = {"operationName": "Regions", "query": QUERY_REGIONS, "variables": {}}
     data = await _post_json(session, CMS_GRAPHQL_URL, headers, payload)
 
-    regions = (
-        (data or {}).get("data", {})
-        .get("PGKExtended", {})
-        .get("wasteSchedulesRegionsPGK", {})
-        .get("regions", [])
-    )
-
-    names: List[str] = []
-    if isinstance(regions, list):
-        for r in regions:
-            if isinstance(r, dict) and r.get("name"):
-                names.append(str(r["name"]))
+    try:
+        regions = data["data"]["PGKExtended"]["wasteSchedulesRegionsPGK"]["regions"]
+    except (KeyError, TypeError):
+        regions = []
 
-    # Usuwamy duplikaty (case-insensitive) i sortujemy stabilnie
-    uniq: Dict[str, str] = {}
-    for n in names:
-        key = n.strip().casefold()
-        if key and key not in uniq:
-            uniq[key] = n.strip()
+    if not isinstance(regions, list):
+        return []
 
-    return sorted(uniq.values())
+    # Usuwamy duplikaty (case-insensitive) w jednym przejściu i sortujemy
+    seen: Set[str] = set()
+    out: List[str] = []
+    for r in regions:
+        try:
+            name = r.get("name")
+        except AttributeError:
+            continue
+        if not name:
+            continue
+        stripped = str(name).strip()
+        key = stripped.casefold()
+        if key and key not in seen:
+            seen.add(key)
+            out.append(stripped)
+
+    out.sort()
+    return out
 
 
 async def _fetch_locations(
@@ -108,9 +211,29 @@ async def _fetch_locations(
     region: str,
     search_term: str,
 ) -> List[str]:
-    headers = dict(HEADERS_BASE)
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
+    """Zwróć lokalizacje pasujące do frazy (z krótkiego cache albo z CMS)."""
+    key = (region, search_term.strip().casefold())
+    cached = _locations_cache.get(key)
+    if cached and time.monotonic() - cached[1] < LOCATIONS_MAX_AGE:
+        return list(cached[0])
+
+    locations = await _query_locations(session, token, region, search_term)
+    if locations:
+        _locations_cache.pop(key, None)
+        _locations_cache[key] = (locations, time.monotonic())
+        # Ograniczamy rozmiar – wyrzucamy najstarsze wpisy
+        while len(_locations_cache) > LOCATIONS_CACHE_SIZE:
+            del _locations_cache[next(iter(_locations_cache))]
+    return list(locations)
+
+
+async def _query_locations(
+    session: aiohttp.ClientSession,
+    token: Optional[str],
+    region: str,
+    search_term: str,
+) -> List[str]:
+    headers = _headers(token)
 
     payload = {
         "operationName": "getLocations",
@@ -119,19 +242,23 @@ async def _fetch_locations(
     }
 
     data = await _post_json(session, CMS_GRAPHQL_URL, headers, payload)
-    locs = (
-        (data or {}).get("data", {})
-        .get("PGKExtended", {})
-        .get("wasteSchedulesLocationsByRegionPGK", {})
-        .get("locations", [])
-    )
+    try:
+        locs = data["data"]["PGKExtended"]["wasteSchedulesLocationsByRegionPGK"][
+            "locations"
+        ]
+    except (KeyError, TypeError):
+        locs = []
 
     if not isinstance(locs, list):
         return []
 
-    # Prosty uniq + sort
-    out = sorted({str(x).strip() for x in locs if x})
-    return out
+    # Prosty uniq + sort (pomijamy wpisy puste po strip)
+    return sorted({s for x in locs if x and (s := str(x).strip())})
+
+
+def _options(values: List[str]) -> Dict[str, str]:
+    """Opcje listy wyboru: dict zachowuje kolejność w UI i sprawdza wybór w O(1)."""
+    return {value: value for value in values}
 
 
 class PGKSlupskConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -139,6 +266,12 @@ class PGKSlupskConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 2
 
+    def __init__(self) -> None:
+        """Inicjalizacja flow – wyniki zapytań trzymamy między krokami."""
+        self._token: Optional[str] = None
+        self._regions: List[str] = []
+        self._locations: Dict[Tuple[str, str], List[str]] = {}
+
     async def async_step_user(self, user_input=None):
         """Krok 1: wybór regionu."""
         errors: Dict[str, str] = {}
@@ -147,9 +280,28 @@ class PGKSlupskConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             self.context["region"] = user_input["region"]
             return await self.async_step_location_search()
 
-        async with aiohttp.ClientSession() as session:
-            token = await _create_token(session)
-            regions = await _fetch_regions(session, token)
+        if self._regions:
+            regions = self._regions
+        else:
+            session = async_get_clientsession(self.hass)
+            try:
+                # Lista regionów nie wymaga tokenu – oba zapytania idą równolegle,
+                # a token przyda się dopiero przy wyszukiwaniu lokalizacji
+                self._token, regions = await asyncio.gather(
+                    _create_token(session),
+                    _fetch_regions(session, None),
+                    return_exceptions=True,
+                )
+                regions = _unauthenticated_result(regions, self._token, "regions")
+                if not regions and self._token:
+                    # Bez tokenu nic nie przyszło (albo błąd) – ponawiamy z autoryzacją
+                    regions = await _fetch_regions(session, self._token)
+            except _API_ERRORS as err:
+                _LOGGER.warning("PGK regions error: %s", err)
+                regions = []
+
+            regions = await self._async_sync_stored_regions(regions)
+            self._regions = regions
 
         if not regions:
             errors["base"] = "cannot_connect"
@@ -157,10 +309,36 @@ class PGKSlupskConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         return self.async_show_form(
             step_id="user",
-            data_schema=vol.Schema({vol.Required("region"): vol.In(regions)}),
+            data_schema=vol.Schema({vol.Required("region"): vol.In(_options(regions))}),
             errors=errors,
         )
 
+    async def _async_sync_stored_regions(self, regions: List[str]) -> List[str]:
+        """Zapisz świeżą listę regionów albo wczytaj ostatnią zapisaną.
+
+        Regiony zmieniają się rzadko, a GraphQL (POST) nie obsługuje ETag,
+        więc trzymamy kopię w .storage. Plik czytamy tylko awaryjnie (błąd
+        API), a zapisujemy tylko, gdy pobrana lista różni się od ostatniej.
+        """
+        global _stored_regions
+
+        store: Store = Store(self.hass, REGIONS_STORE_VERSION, REGIONS_STORE_KEY)
+
+        if regions:
+            if regions != _stored_regions:
+                await store.async_save({"regions": regions})
+                _stored_regions = list(regions)
+            return regions
+
+        stored = await store.async_load()
+        stored_regions = stored.get("regions") if isinstance(stored, dict) else None
+        if isinstance(stored_regions, list) and stored_regions:
+            _LOGGER.warning("PGK: używam zapisanej listy regionów z powodu błędu API")
+            _stored_regions = [str(r) for r in stored_regions]
+            return list(_stored_regions)
+
+        return []
+
     async def async_step_location_search(self, user_input=None):
         """Krok 2: wpisanie frazy do wyszukiwania ulicy/lokalizacji."""
         errors: Dict[str, str] = {}
@@ -200,9 +378,39 @@ class PGKSlupskConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 },
             )
 
-        async with aiohttp.ClientSession() as session:
-            token = await _create_token(session)
-            locations = await _fetch_locations(session, token, region, search_term)
+        locations = self._locations.get((region, search_term))
+        if locations is None:
+            session = async_get_clientsession(self.hass)
+            try:
+                if self._token:
+                    # Token z kroku 1
+                    locations = await _fetch_locations(
+                        session, self._token, region, search_term
+                    )
+                else:
+                    # W kroku 1 token się nie udał – pobieramy go równolegle
+                    # z wyszukiwaniem i ponawiamy z nim przy pustym wyniku lub błędzie
+                    self._token, locations = await asyncio.gather(
+                        _create_token(session),
+                        _fetch_locations(session, None, region, search_term),
+                        return_exceptions=True,
+                    )
+                    locations = _unauthenticated_result(locations, self._token, "locations")
+                    if not locations and self._token:
+                        locations = await _fetch_locations(
+                            session, self._token, region, search_term
+                        )
+            except _API_ERRORS as err:
+                _LOGGER.warning("PGK locations error: %s", err)
+                errors["base"] = "cannot_connect"
+                # Wracamy do wyszukiwania – ponowne wysłanie frazy ponowi zapytanie
+                return self.async_show_form(
+                    step_id="location_search",
+                    data_schema=vol.Schema({vol.Required("search_term"): str}),
+                    errors=errors,
+                )
+            if locations:
+                self._locations[(region, search_term)] = locations
 
         if not locations:
             errors["base"] = "no_results"
@@ -219,6 +427,6 @@ class PGKSlupskConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         return self.async_show_form(
             step_id="location_select",
-            data_schema=vol.Schema({vol.Required("location"): vol.In(locations)}),
+            data_schema=vol.Schema({vol.Required("location"): vol.In(_options(locations))}),
             errors=errors,
         )
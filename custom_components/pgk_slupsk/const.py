@@ -1,19 +1,13 @@
+from types import MappingProxyType
+
 DOMAIN = "pgk_slupsk"
 
 DEVICE_NAME = "Odbiór odpadów"
 
-WASTE_TYPE_ICONS = {
-    "10": "mdi:leaf",
-    "13": "mdi:pine-tree",
-    "1": "mdi:recycle",
-    "3": "mdi:newspaper",
-    "11": "mdi:bottle-wine",
-    "2": "mdi:trash-can",
-    "7": "mdi:dump-truck",
-    "26": "mdi:tshirt-crew",
-}
+# Końcówka unique_id sensora "Odpady do przygotowania" (wyzwalacze i akcje urządzenia)
+WASTE_TOMORROW_SUFFIX = "_waste_tomorrow"
 
-WASTE_TYPES = {
+WASTE_TYPES = MappingProxyType({
     "BIO": {"icon": "mdi:leaf", "name": "Bio"},
     "CHO": {"icon": "mdi:pine-tree", "name": "Choinki"},
     "TW": {"icon": "mdi:recycle", "name": "Plastik i metal"},
@@ -22,7 +16,7 @@ WASTE_TYPES = {
     "ZM": {"icon": "mdi:trash-can", "name": "Zmieszane"},
     "GAB": {"icon": "mdi:dump-truck", "name": "Gabaryty"},
     "OIT": {"icon": "mdi:tshirt-crew", "name": "Tekstylia"},
-}
+})
 
 # Nazwy dni tygodnia po polsku
-DAYS_TRANSLATION = ["poniedziałek", "wtorek", "środa", "czwartek", "piątek", "sobota", "niedziela"]
+DAYS_TRANSLATION = ("poniedziałek", "wtorek", "środa", "czwartek", "piątek", "sobota", "niedziela")
@@ -10,11 +10,11 @@ from homeassistant.const import (
     CONF_DOMAIN,
     CONF_TYPE,
 )
-from homeassistant.core import HomeAssistant, Context
+from homeassistant.core import Context, HomeAssistant
 from homeassistant.helpers import entity_registry as er, config_validation as cv
 from homeassistant.helpers.typing import ConfigType, TemplateVarsType
 
-from .const import DOMAIN
+from .const import DOMAIN, WASTE_TOMORROW_SUFFIX
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,6 +24,10 @@ CONF_NOTIFY_SERVICE = "notify_service"
 ACTION_SEND_NOTIFICATION = "send_waste_pickup_notification"
 ACTION_TYPES = {ACTION_SEND_NOTIFICATION}
 
+# device_id -> entity_id sensora *_waste_tomorrow (uzupełniane przy pierwszym użyciu;
+# przed użyciem weryfikowane w rejestrze encji, więc nie trzeba nasłuchiwać zmian)
+_WASTE_TOMORROW_ENTITIES: Dict[str, str] = {}
+
 # Base schema dla akcji urządzenia:
 # DEVICE_ACTION_BASE_SCHEMA dodaje device_id + domain
 ACTION_SCHEMA = cv.DEVICE_ACTION_BASE_SCHEMA.extend(
@@ -35,25 +39,46 @@ ACTION_SCHEMA = cv.DEVICE_ACTION_BASE_SCHEMA.extend(
 )
 
 
-async def async_get_actions(hass: HomeAssistant, device_id: str) -> List[Dict]:
-    """Lista akcji dostępnych dla urządzenia PGK."""
+def _is_waste_tomorrow_entry(entry: er.RegistryEntry | None, device_id: str) -> bool:
+    """Czy wpis rejestru to sensor *_waste_tomorrow danego urządzenia."""
+    return (
+        entry is not None
+        and entry.device_id == device_id
+        and bool(entry.unique_id)
+        and entry.unique_id.endswith(WASTE_TOMORROW_SUFFIX)
+    )
+
+
+def _find_waste_tomorrow_entity(
+    hass: HomeAssistant, device_id: str
+) -> str | None:
+    """Znajdź encję *_waste_tomorrow urządzenia i zapamiętaj ją.
 
+    Zapamiętany entity_id sprawdzamy jednym odczytem z rejestru (zmiana
+    nazwy albo usunięcie encji => pełne wyszukiwanie od nowa).
+    """
     registry: er.EntityRegistry = er.async_get(hass)
-    entries = er.async_entries_for_device(registry, device_id)
 
-    actions: List[Dict] = []
+    cached = _WASTE_TOMORROW_ENTITIES.get(device_id)
+    if cached and _is_waste_tomorrow_entry(registry.async_get(cached), device_id):
+        return cached
 
-    _LOGGER.debug(
-        "PGK device_action: device_id=%s, liczba entries=%d",
-        device_id,
-        len(entries),
-    )
+    for entry in er.async_entries_for_device(registry, device_id):
+        if _is_waste_tomorrow_entry(entry, device_id):
+            _WASTE_TOMORROW_ENTITIES[device_id] = entry.entity_id
+            return entry.entity_id
+
+    _WASTE_TOMORROW_ENTITIES.pop(device_id, None)
+    return None
+
+
+async def async_get_actions(hass: HomeAssistant, device_id: str) -> List[Dict]:
+    """Lista akcji dostępnych dla urządzenia PGK."""
+
+    actions: List[Dict] = []
 
     # Sprawdzamy, czy urządzenie ma sensor *_waste_tomorrow
-    has_waste_tomorrow = any(
-        entry.unique_id and entry.unique_id.endswith("_waste_tomorrow")
-        for entry in entries
-    )
+    has_waste_tomorrow = _find_waste_tomorrow_entity(hass, device_id) is not None
 
     if not has_waste_tomorrow:
         _LOGGER.debug(
@@ -126,16 +151,8 @@ async def async_call_action_from_config(
         )
         return
 
-    registry: er.EntityRegistry = er.async_get(hass)
-    entries = er.async_entries_for_device(registry, device_id)
-
-    entity_id: str | None = None
-
-    # Szukamy sensora *_waste_tomorrow dla tego urządzenia
-    for entry in entries:
-        if entry.unique_id and entry.unique_id.endswith("_waste_tomorrow"):
-            entity_id = entry.entity_id
-            break
+    # Encja z pamięci (zweryfikowana w rejestrze); w razie zmian – szukamy ponownie
+    entity_id = _find_waste_tomorrow_entity(hass, device_id)
 
     if not entity_id:
         _LOGGER.warning(
@@ -145,6 +162,7 @@ async def async_call_action_from_config(
         return
 
     state = hass.states.get(entity_id)
+
     value = (state.state or "").strip().lower() if state else ""
     
     # Jeśli wartość to "brak" → NIE wysyłamy powiadomienia
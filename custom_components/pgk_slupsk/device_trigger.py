@@ -24,7 +24,7 @@ from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.trigger import TriggerActionType, TriggerInfo
 from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import DOMAIN, WASTE_TOMORROW_SUFFIX
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -56,23 +56,27 @@ async def async_get_triggers(hass: HomeAssistant, device_id: str) -> List[Dict]:
         len(entries),
     )
 
-    for entry in entries:
-        _LOGGER.debug(
-            "PGK device_trigger: sprawdzam entity_id=%s, domain=%s, unique_id=%s",
-            entry.entity_id,
-            entry.domain,
-            entry.unique_id,
-        )
+    debug = _LOGGER.isEnabledFor(logging.DEBUG)
 
-        # 🔥 TU DZIAŁA FILTR:
-        # w sensors.py: self._unique_id = f"{entry_id}_waste_tomorrow"
-        # więc sprawdzamy, czy unique_id kończy się na '_waste_tomorrow'
-        if entry.unique_id and entry.unique_id.endswith("_waste_tomorrow"):
+    for entry in entries:
+        if debug:
             _LOGGER.debug(
-                "PGK device_trigger: dopasowano sensor waste_tomorrow: %s",
+                "PGK device_trigger: sprawdzam entity_id=%s, domain=%s, unique_id=%s",
                 entry.entity_id,
+                entry.domain,
+                entry.unique_id,
             )
 
+        # 🔥 TU DZIAŁA FILTR:
+        # w sensor.py: self._attr_unique_id = f"{entry_id}{WASTE_TOMORROW_SUFFIX}"
+        # więc sprawdzamy, czy unique_id kończy się na '_waste_tomorrow'
+        if entry.unique_id and entry.unique_id.endswith(WASTE_TOMORROW_SUFFIX):
+            if debug:
+                _LOGGER.debug(
+                    "PGK device_trigger: dopasowano sensor waste_tomorrow: %s",
+                    entry.entity_id,
+                )
+
             triggers.append(
                 {
                     # pola wymagane przez DEVICE_TRIGGER_BASE_SCHEMA
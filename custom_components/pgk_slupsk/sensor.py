@@ -12,18 +12,22 @@ Zmiany:
 from __future__ import annotations
 
 import asyncio
-import json
+import bisect
 import logging
 import os
 from datetime import datetime, timedelta, time, date
-from typing import Any, Dict, List
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, List, Tuple
 
 import aiohttp
+import orjson
 import re
 from urllib.parse import quote
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceInfo, DeviceEntryType
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity import generate_entity_id
@@ -33,18 +37,33 @@ from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
-
-from .const import DOMAIN, WASTE_TYPES, DAYS_TRANSLATION, DEVICE_NAME
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
+
+from .const import (
+    DOMAIN,
+    WASTE_TYPES,
+    DAYS_TRANSLATION,
+    DEVICE_NAME,
+    WASTE_TOMORROW_SUFFIX,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 RETRY_INTERVAL = 600  # 10 minut w sekundach
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30)
 
 # Nowe API (RSC/Flight)
 BASE_SITE = "https://pgkslupsk.pl"
 PATH = "/harmonogram-odbioru-odpadow"
 
 
+def _format_timestamp(moment: datetime) -> str:
+    """Znacznik czasu "RRRR-MM-DD GG:MM:SS" (bez strefy i mikrosekund)."""
+    return moment.replace(microsecond=0, tzinfo=None).isoformat(sep=" ")
+
+
+@lru_cache(maxsize=32)
 def _build_rsc_url(customer_type: str, region: str, location: str) -> str:
     return (
         f"{BASE_SITE}{PATH}"
@@ -54,51 +73,72 @@ def _build_rsc_url(customer_type: str, region: str, location: str) -> str:
     )
 
 
-_SCHEDULE_DATA_RE = re.compile(r'"scheduleData"\s*:\s*{')
+_SCHEDULE_DATA_RE = re.compile(rb'"scheduleData"\s*:\s*{')
 
+# Znaki istotne dla struktury JSON – tylko na nich zatrzymuje się skaner.
+# Wszystkie są ASCII, a w UTF-8 bajty ASCII nie występują wewnątrz znaków
+# wielobajtowych, więc można skanować surowe bajty bez dekodowania.
+_JSON_DELIM_RE = re.compile(rb'["\\{}]')
+_QUOTE, _BACKSLASH, _OPEN, _CLOSE = b'"\\{}'
 
-def _extract_balanced_object(text: str, start_index: int) -> str:
-    """Wyciąga substring JSON obiektu {...} od start_index (na '{') do pasującej '}'."""
-    if start_index < 0 or start_index >= len(text) or text[start_index] != "{":
+
+def _extract_balanced_object(data: bytes, start_index: int) -> bytes:
+    """Wyciąga bajty obiektu JSON {...} od start_index (na '{') do pasującej '}'.
+
+    Zamiast iterować po każdym znaku, przeskakujemy regexem między
+    cudzysłowami, backslashami i klamrami.
+    """
+    if start_index < 0 or start_index >= len(data) or data[start_index] != _OPEN:
         raise ValueError("start_index nie wskazuje na '{'")
 
     depth = 0
     in_str = False
-    esc = False
+    escaped_pos = -1
 
-    for i in range(start_index, len(text)):
-        ch = text[i]
+    for m in _JSON_DELIM_RE.finditer(data, start_index):
+        i = m.start()
+        ch = data[i]
 
         if in_str:
-            if esc:
-                esc = False
-            elif ch == "\\":
-                esc = True
-            elif ch == '"':
+            if i == escaped_pos:
+                # znak poprzedzony backslashem – nie kończy napisu
+                continue
+            if ch == _BACKSLASH:
+                escaped_pos = i + 1
+            elif ch == _QUOTE:
                 in_str = False
             continue
 
-        if ch == '"':
+        if ch == _QUOTE:
             in_str = True
-            continue
-
-        if ch == "{":
+        elif ch == _OPEN:
             depth += 1
-        elif ch == "}":
+        elif ch == _CLOSE:
             depth -= 1
             if depth == 0:
-                return text[start_index : i + 1]
+                return data[start_index : i + 1]
 
     raise ValueError("Nie udało się domknąć obiektu JSON (brak pasującej '}').")
 
 
-def _extract_schedule_data_from_rsc(rsc_text: str) -> Dict[str, Any]:
-    m = _SCHEDULE_DATA_RE.search(rsc_text)
+def _extract_schedule_data_from_rsc(body: bytes) -> Dict[str, Any]:
+    """Wyciągnij scheduleData z surowych bajtów payloadu RSC.
+
+    Dekodujemy (w json_loads) tylko wycięty obiekt, a nie całą odpowiedź.
+    """
+    m = _SCHEDULE_DATA_RE.search(body)
     if not m:
         raise ValueError('Nie znalazłem pola "scheduleData" w RSC.')
-    obj_start = rsc_text.find("{", m.end() - 1)
-    obj_str = _extract_balanced_object(rsc_text, obj_start)
-    return json.loads(obj_str)
+    obj_start = body.find(b"{", m.end() - 1)
+    return json_loads(_extract_balanced_object(body, obj_start))
+
+
+_MONTH_FIELDS = itemgetter("year", "monthNumber", "dayItems")
+
+
+def _clean_str(value: Any) -> str:
+    """Przycięty napis albo "" dla None/pustych wartości."""
+    return value.strip() if isinstance(value, str) else ""
 
 
 def _build_fraction_index(node: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
@@ -111,23 +151,26 @@ def _build_fraction_index(node: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
     if not isinstance(edges, list):
         return out
     for e in edges:
-        if not isinstance(e, dict):
-            continue
-        n = e.get("node")
+        n = e.get("node") if isinstance(e, dict) else None
         if not isinstance(n, dict):
             continue
-        code = (n.get("code") or "").strip()
-        if not code:
-            continue
-        out[code] = {
-            "name": (n.get("name") or "").strip(),
-            "color": (n.get("color") or "").strip(),
-        }
+        code = _clean_str(n.get("code"))
+        if code:
+            out[code] = {
+                "name": _clean_str(n.get("name")),
+                "color": _clean_str(n.get("color")),
+            }
     return out
 
 
-def _convert_schedule_to_legacy(schedule_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Konwersja node.schedule -> stary format JSON."""
+def _convert_schedule_to_processed(
+    schedule_data: Dict[str, Any],
+) -> Dict[str, Dict[str, Any]]:
+    """Konwersja node.schedule -> słownik dla sensorów (jednym przejściem).
+
+    Wynik ma ten sam kształt co _process_raw_data:
+    {TypOdpaduId: {"TypOdpadu", "Kolor", "Daty" (posortowane, bez duplikatów)}}.
+    """
     node = schedule_data.get("node")
     if not isinstance(node, dict):
         raise ValueError("scheduleData.node nie jest dict")
@@ -137,54 +180,48 @@ def _convert_schedule_to_legacy(schedule_data: Dict[str, Any]) -> List[Dict[str,
     if not isinstance(schedule, list):
         raise ValueError("node.schedule nie jest listą")
 
-    legacy: List[Dict[str, Any]] = []
-    hid = 1
+    processed: Dict[str, Dict[str, Any]] = {}
+    # code -> związana metoda set.add zbioru dat; metadane frakcji
+    # rozwiązujemy tylko przy pierwszym wystąpieniu kodu
+    date_adders: Dict[str, Any] = {}
 
     def add_entry(date_str: str, code: str) -> None:
-        nonlocal hid
-        meta = frac_idx.get(code, {"name": "", "color": ""})
-        legacy.append(
-            {
-                "HarmonogramId": hid,
-                "AkcjaId": 1,
-                "Akcja": "HARMONOGRAM",
-                "TypOdpaduId": code,
+        try:
+            add_date = date_adders[code]
+        except KeyError:
+            meta = frac_idx.get(code, {"name": "", "color": ""})
+            dates: set[str] = set()
+            processed[code] = {
                 "TypOdpadu": meta.get("name", ""),
                 "Kolor": meta.get("color", ""),
-                "Data": date_str,
+                "Daty": dates,
             }
-        )
-        hid += 1
+            add_date = date_adders[code] = dates.add
+        add_date(date_str)
 
+    # Optymistyczna ścieżka: poprawne dane API przechodzą bez sprawdzania
+    # typów, a niepoprawny miesiąc/dzień/frakcję po prostu pomijamy.
     for month in schedule:
-        if not isinstance(month, dict):
-            continue
-        year = month.get("year")
-        month_no = month.get("monthNumber")
-        if not isinstance(year, int) or not isinstance(month_no, int):
-            continue
-
-        day_items = month.get("dayItems")
-        if not isinstance(day_items, list):
+        try:
+            year, month_no, day_items = _MONTH_FIELDS(month)
+            month_prefix = f"{year:d}-{month_no:02d}-"
+            days = iter(day_items)
+        except (TypeError, KeyError, ValueError):
             continue
 
-        for day in day_items:
-            if not isinstance(day, dict):
-                continue
-            day_no = day.get("dayNumber")
-            if not isinstance(day_no, int):
-                continue
-
-            date_str = f"{year}-{month_no:02d}-{day_no:02d}"
-
-            fractions_map = day.get("fractionsMap")
-            if not isinstance(fractions_map, list):
+        for day in days:
+            try:
+                date_str = f"{month_prefix}{day['dayNumber']:02d}"
+                fractions_map = iter(day["fractionsMap"])
+            except (TypeError, KeyError, ValueError):
                 continue
 
             for frac in fractions_map:
-                if not isinstance(frac, dict):
+                try:
+                    parent_code = _clean_str(frac.get("code"))
+                    child_list = frac.get("childFractions") or ()
+                except AttributeError:
                     continue
-                parent_code = (frac.get("code") or "").strip()
                 if not parent_code:
                     continue
 
@@ -192,25 +229,86 @@ def _convert_schedule_to_legacy(schedule_data: Dict[str, Any]) -> List[Dict[str,
                 add_entry(date_str, parent_code)
 
                 # childFractions: jeśli code != null => dodatkowy wpis (ta sama data)
-                # unikamy dubla, gdy child == parent
-                child_list = frac.get("childFractions") or []
-                if isinstance(child_list, list):
-                    for child in child_list:
-                        if not isinstance(child, dict):
-                            continue
-                        child_code = child.get("code")
-                        if not isinstance(child_code, str) or not child_code.strip():
-                            continue
-                        child_code = child_code.strip()
-                        if child_code == parent_code:
-                            continue
+                # unikamy dubla, gdy child == parent; niepoprawne dziecko
+                # pomijamy pojedynczo, nie tracąc kolejnych
+                if not isinstance(child_list, list):
+                    continue
+                for child in child_list:
+                    if not isinstance(child, dict):
+                        continue
+                    child_code = _clean_str(child.get("code"))
+                    if child_code and child_code != parent_code:
                         add_entry(date_str, child_code)
 
-    legacy.sort(key=lambda r: (r.get("Data", ""), r.get("TypOdpaduId", "")))
-    for i, row in enumerate(legacy, start=1):
-        row["HarmonogramId"] = i
+    for entry in processed.values():
+        entry["Daty"] = sorted(entry["Daty"])
 
-    return legacy
+    # Ta sama kolejność typów co w _process_raw_data (plik posortowany po
+    # (Data, TypOdpaduId)) – inaczej stan "na jutro" i tytuły w kalendarzu
+    # zmieniałyby kolejność zależnie od tego, która ścieżka ostatnio działała
+    return dict(sorted(processed.items(), key=lambda kv: (kv[1]["Daty"][0], kv[0])))
+
+
+def _attach_date_objs(processed: Dict[str, Dict[str, Any]]) -> None:
+    """Dodaj do każdego typu "DatyObj" – daty sparsowane raz, w koordynatorze.
+
+    "Daty" i "DatyObj" są równoległe (ten sam indeks = ta sama data),
+    posortowane i bez niepoprawnych wpisów.
+    """
+    for wt_data in processed.values():
+        date_objs: List[date] = []
+        for d_str in wt_data["Daty"]:
+            try:
+                date_objs.append(date.fromisoformat(d_str))
+            except ValueError:
+                continue
+        wt_data["DatyObj"] = date_objs
+        wt_data["Daty"] = [d.isoformat() for d in date_objs]
+
+
+def _attach_display_info(processed: Dict[str, Dict[str, Any]]) -> None:
+    """Dodaj do każdego typu wyświetlaną nazwę ("name") i ikonę ("icon")."""
+    for waste_type_id, wt_data in processed.items():
+        waste_info = WASTE_TYPES.get(waste_type_id, {})
+        wt_data["name"] = f"{waste_info.get('name', wt_data['TypOdpadu'])}"
+        wt_data["icon"] = waste_info.get("icon", "mdi:trash-can")
+
+
+def _build_date_index(processed: Dict[str, Dict[str, Any]]) -> Dict[date, List[str]]:
+    """Indeks data -> nazwy typów odpadów odbieranych tego dnia.
+
+    Klucze są posortowane rosnąco (sortujemy raz, tutaj), a nazwy w obrębie
+    dnia zachowują kolejność typów z koordynatora.
+    """
+    by_date: Dict[date, List[str]] = {}
+    for wt_data in processed.values():
+        name = wt_data["name"]
+        for d_obj in wt_data["DatyObj"]:
+            by_date.setdefault(d_obj, []).append(name)
+    return dict(sorted(by_date.items()))
+
+
+def _processed_to_legacy(processed: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Odtwórz "stary" format JSON (lista obiektów) do zapisu w pliku cache."""
+    rows = [
+        (date_str, code, wt_data)
+        for code, wt_data in processed.items()
+        for date_str in wt_data["Daty"]
+    ]
+    rows.sort(key=lambda r: (r[0], r[1]))
+
+    return [
+        {
+            "HarmonogramId": hid,
+            "AkcjaId": 1,
+            "Akcja": "HARMONOGRAM",
+            "TypOdpaduId": code,
+            "TypOdpadu": wt_data["TypOdpadu"],
+            "Kolor": wt_data["Kolor"],
+            "Data": date_str,
+        }
+        for hid, (date_str, code, wt_data) in enumerate(rows, start=1)
+    ]
 
 
 async def async_setup_entry(
@@ -257,10 +355,9 @@ async def async_setup_entry(
         entry_id=entry_id,
     )
 
-    # Zarejestrowanie sensorów w koordynatorze (do ręcznego odświeżania po zmianie danych)
-    coordinator.sensors = sensors + [day_before_sensor]
-
-    async_add_entities(sensors + [day_before_sensor], update_before_add=True)
+    # Stan liczony jest już w konstruktorach z danych pierwszego odświeżenia,
+    # więc nie potrzebujemy dodatkowego async_update przed dodaniem encji
+    async_add_entities(sensors + [day_before_sensor], update_before_add=False)
 
 
 class PGKSlupskCoordinator(DataUpdateCoordinator[Dict[str, Dict[str, Any]]]):
@@ -287,16 +384,38 @@ class PGKSlupskCoordinator(DataUpdateCoordinator[Dict[str, Dict[str, Any]]]):
             _LOGGER,
             name=DOMAIN,
             update_interval=timedelta(days=1),
+            # encje dostają powiadomienie tylko, gdy przetworzone dane się zmienią
+            always_update=False,
         )
 
-        # Lista sensorów (uzupełniana w async_setup_entry)
-        self.sensors: List[SensorEntity] = []
+        # Czas ostatniego pobrania danych (API albo plik) – poza self.data,
+        # żeby nie psuć porównania danych między odświeżeniami
+        self.data_updated: str | None = None
+
+        # data -> nazwy typów odpadów (przebudowywany przy każdej aktualizacji)
+        self.by_date: Dict[date, List[str]] = {}
+
+        # "Dziś" i znacznik ostatniego przeliczenia sensorów – liczone raz
+        # na przebieg odświeżania, wspólne dla wszystkich sensorów
+        now = dt_util.now()
+        self.today: date = now.date()
+        self.tomorrow: date = self.today + timedelta(days=1)
+        self.refreshed: str = _format_timestamp(now)
+
+        # Ręczne odświeżenie – encje zapisują stan nawet bez zmian
+        self.force_write = False
+
+        # Współdzielona sesja HA (pula połączeń, bez nowego TLS co odświeżenie)
+        self._session = async_get_clientsession(hass)
 
         # Ścieżki do plików z lokalną kopią danych i ETagiem
         base_dir = os.path.dirname(os.path.abspath(__file__))
         self._json_path = os.path.join(base_dir, f"pgk_slupsk_{entry_id}.json")
         self._etag_path = os.path.join(base_dir, f"pgk_slupsk_{entry_id}.etag")
 
+        # Ostatnio sparsowany plik JSON: ((st_mtime_ns, st_size), dane)
+        self._raw_cache: tuple[tuple[int, int], Any] | None = None
+
         _LOGGER.debug(
             "PGKSlupskCoordinator init: type=%s, region=%s, location=%s, entry_id=%s, json_path=%s, etag_path=%s",
             self.customer_type,
@@ -307,29 +426,62 @@ class PGKSlupskCoordinator(DataUpdateCoordinator[Dict[str, Dict[str, Any]]]):
             self._etag_path,
         )
 
-        # Harmonogram – zaplanowanie nocnego odświeżenia danych z API
-        # Codziennie o północy losujemy moment w oknie 00:05–05:00 i planujemy retry_update_data().
-        async_track_time_change(
-            hass,
-            self._schedule_random_night_refresh,
-            hour=0,
-            minute=0,
-            second=0,
-        )
-
-        # Harmonogram – odświeżenie stanów wszystkich sensorów o 00:00:05 (bez API)
-        async_track_time_change(
-            hass,
-            self._handle_sensors_midnight_refresh,
-            hour=0,
-            minute=0,
-            second=5,
-        )
+        # Zaplanowane (losowe) nocne odświeżenie API – do anulowania przy unload
+        self._unsub_night_refresh: CALLBACK_TYPE | None = None
+        # Ponowna próba po nieudanym odświeżeniu (retry_update_data)
+        self._unsub_retry: CALLBACK_TYPE | None = None
+        # Wpis rozładowany – nie planujemy już żadnych ponowień
+        self._stopped = False
 
     # -------------------------------------------------------------------------
     # Harmonogram – wersja oparta o helpery HA
     # -------------------------------------------------------------------------
 
+    @callback
+    def async_start_schedules(self) -> CALLBACK_TYPE:
+        """Zarejestruj nocne harmonogramy; zwraca funkcję, która je wyłącza.
+
+        Wynik trafia do entry.async_on_unload, więc reload/usunięcie wpisu
+        nie zostawia działających timerów.
+        """
+        unsubs = [
+            # Codziennie o północy losujemy moment w oknie 00:00–04:59
+            # i planujemy retry_update_data().
+            async_track_time_change(
+                self.hass,
+                self._schedule_random_night_refresh,
+                hour=0,
+                minute=0,
+                second=0,
+            ),
+            # Odświeżenie stanów wszystkich sensorów o 00:00:05 (bez API)
+            async_track_time_change(
+                self.hass,
+                self._handle_sensors_midnight_refresh,
+                hour=0,
+                minute=0,
+                second=5,
+            ),
+        ]
+
+        @callback
+        def _stop_schedules() -> None:
+            self._stopped = True
+            for unsub in unsubs:
+                unsub()
+            self._cancel_night_refresh()
+            self._cancel_retry()
+
+        return _stop_schedules
+
+    @callback
+    def _cancel_night_refresh(self) -> None:
+        """Anuluj zaplanowane nocne odświeżenie API (jeśli czeka)."""
+        if self._unsub_night_refresh is not None:
+            self._unsub_night_refresh()
+            self._unsub_night_refresh = None
+
+    @callback
     def _schedule_random_night_refresh(self, now: datetime) -> None:
         """Codziennie o północy zaplanuj losowe odświeżenie danych API
         w oknie godzinowym 00:00–05:59.
@@ -360,155 +512,243 @@ class PGKSlupskCoordinator(DataUpdateCoordinator[Dict[str, Dict[str, Any]]]):
             delay,
         )
 
+        @callback
         def _do_refresh(_now: datetime) -> None:
+            self._unsub_night_refresh = None
             _LOGGER.debug("PGK Słupsk – rozpoczynamy automatyczne odświeżenie danych (API)")
-            self.hass.loop.create_task(self.retry_update_data())
+            self.hass.async_create_task(self.retry_update_data())
 
-        # planujemy wywołanie na wyliczony moment
-        async_call_later(self.hass, delay, _do_refresh)
+        # planujemy wywołanie na wyliczony moment (poprzednie, jeśli czeka – anulujemy)
+        self._cancel_night_refresh()
+        self._unsub_night_refresh = async_call_later(self.hass, delay, _do_refresh)
 
 
-    async def _handle_sensors_midnight_refresh(self, now: datetime) -> None:
+    async def _handle_sensors_midnight_refresh(
+        self, now: datetime, force: bool = False
+    ) -> None:
         """Codziennie odśwież stany wszystkich sensorów tuż po północy (00:00:05),
         bez pobierania nowych danych z API – tylko przeliczenie stanu i atrybutów.
+
+        Encje (CoordinatorEntity) dostają zwykłe powiadomienie koordynatora;
+        stan zapisują tylko te, których wynik się zmienił (chyba że
+        force=True – ręczne odświeżenie).
         """
         _LOGGER.debug(
-            "PGK Słupsk – odświeżanie stanów sensorów (bez pobierania danych), liczba sensorów: %s",
-            len(self.sensors),
+            "PGK Słupsk – odświeżanie stanów sensorów (bez pobierania danych)"
         )
 
-        for sensor in list(self.sensors):
-            try:
-                _LOGGER.debug(
-                    "PGK Słupsk – odświeżanie sensora: %s",
-                    getattr(sensor, "entity_id", sensor),
-                )
-                # 1) Zaktualizuj dane wewnętrzne sensora z koordynatora / czasu
-                await sensor.async_update()
-                # 2) Wyślij nowy stan + atrybuty do HA
-                sensor.async_write_ha_state()
-            except Exception as exc:  # noqa: BLE001
-                _LOGGER.debug(
-                    "PGK Słupsk – błąd podczas odświeżania sensora %s: %s",
-                    getattr(sensor, "entity_id", sensor),
-                    exc,
-                )
+        self._set_today(now.date())
+        self.refreshed = _format_timestamp(now)
+
+        self.force_write = force
+        try:
+            self.async_update_listeners()
+        finally:
+            self.force_write = False
+
+    def _set_today(self, today: date) -> None:
+        """Ustaw "dziś"/"jutro" wspólne dla wszystkich sensorów."""
+        self.today = today
+        self.tomorrow = today + timedelta(days=1)
 
     async def async_refresh_sensors(self) -> None:
         """Ręczne odświeżenie sensorów (ta sama logika co o północy)."""
-        from datetime import datetime
-
-        now = datetime.now()
+        now = dt_util.now()
         _LOGGER.debug(
             "PGK Słupsk – ręczne wywołanie odświeżenia sensorów (bez API), now=%s",
             now,
         )
-        await self._handle_sensors_midnight_refresh(now)
+        await self._handle_sensors_midnight_refresh(now, force=True)
 
     async def retry_update_data(self) -> None:
-        """Ponawiaj próbę odświeżenia danych co 10 minut w przypadku niepowodzenia."""
-        while True:
-            try:
-                await self.async_request_refresh()
-                _LOGGER.info("PGK Słupsk - dane zostały pomyślnie odświeżone")
-                break  # Wyjście z pętli po udanym odświeżeniu
-            except UpdateFailed as e:
-                _LOGGER.error(
-                    "Błąd odświeżania danych: %s. Próba ponowienia za 10 minut.",
-                    e,
-                )
-                await asyncio.sleep(RETRY_INTERVAL)
+        """Odśwież dane; po niepowodzeniu zaplanuj ponowną próbę za 10 minut.
+
+        Zamiast pętli z asyncio.sleep planujemy jedno async_call_later –
+        nic nie wisi w tle, a timer jest anulowany przy unload wpisu.
+        """
+        self._cancel_retry()
+        if self._stopped:
+            return
+
+        # async_request_refresh nie rzuca UpdateFailed – wynik jest w last_update_success
+        await self.async_request_refresh()
+
+        # wpis mógł zostać rozładowany w trakcie odświeżania
+        if self._stopped:
+            return
+
+        if self.last_update_success:
+            _LOGGER.info("PGK Słupsk - dane zostały pomyślnie odświeżone")
+            return
+
+        _LOGGER.error(
+            "Błąd odświeżania danych: %s. Próba ponowienia za 10 minut.",
+            self.last_exception,
+        )
+
+        @callback
+        def _do_retry(_now: datetime) -> None:
+            self._unsub_retry = None
+            if not self._stopped:
+                self.hass.async_create_task(self.retry_update_data())
+
+        self._unsub_retry = async_call_later(self.hass, RETRY_INTERVAL, _do_retry)
+
+    @callback
+    def _cancel_retry(self) -> None:
+        """Anuluj zaplanowaną ponowną próbę odświeżenia (jeśli czeka)."""
+        if self._unsub_retry is not None:
+            self._unsub_retry()
+            self._unsub_retry = None
 
     # -------------------------------------------------------------------------
     # Obsługa plików (surowy JSON + ETag)
     # -------------------------------------------------------------------------
 
-    async def _load_raw_json(self) -> Any | None:
+    def _load_raw_json(self) -> Any | None:
         """Wczytaj surowy JSON z pliku (dokładnie to, co zwróciło API)."""
+        try:
+            st = os.stat(self._json_path)
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            _LOGGER.warning(
+                "Nie udało się odczytać lokalnego pliku JSON %s: %s",
+                self._json_path,
+                exc,
+            )
+            return None
 
-        def _load() -> Any | None:
-            if not os.path.exists(self._json_path):
-                return None
-            try:
-                with open(self._json_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except (OSError, json.JSONDecodeError) as exc:
-                _LOGGER.warning(
-                    "Nie udało się odczytać lokalnego pliku JSON %s: %s",
-                    self._json_path,
-                    exc,
-                )
-                return None
+        # Plik się nie zmienił od ostatniego odczytu – nie parsujemy ponownie
+        key = (st.st_mtime_ns, st.st_size)
+        if self._raw_cache is not None and self._raw_cache[0] == key:
+            return self._raw_cache[1]
 
-        return await self.hass.async_add_executor_job(_load)
+        try:
+            with open(self._json_path, "rb") as f:
+                data = json_loads(f.read())
+        except (OSError, ValueError) as exc:
+            _LOGGER.warning(
+                "Nie udało się odczytać lokalnego pliku JSON %s: %s",
+                self._json_path,
+                exc,
+            )
+            return None
 
-    async def _save_raw_json(self, data: Any) -> None:
-        """Zapisz surowy JSON dokładnie tak, jak dostałeś go z API."""
+        self._raw_cache = (key, data)
+        return data
 
-        def _save() -> None:
-            try:
-                with open(self._json_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-            except OSError as exc:
-                _LOGGER.warning(
-                    "Nie udało się zapisać lokalnego pliku JSON %s: %s",
-                    self._json_path,
-                    exc,
-                )
+    def _save_raw_json(self, data: Any) -> bool:
+        """Zapisz surowy JSON dokładnie tak, jak dostałeś go z API.
 
-        await self.hass.async_add_executor_job(_save)
+        Plik czyta tylko integracja, więc zapisujemy go bez wcięć (mniejszy
+        plik, szybszy zapis i ponowny odczyt). Całość trafia najpierw do
+        pliku tymczasowego jednym write(), a potem podmieniamy go atomowo –
+        przerwany zapis nie zostawi uciętego JSON-a. Zwraca True po udanym zapisie.
+        """
+        self._raw_cache = None
+        blob = orjson.dumps(data)
+        tmp_path = f"{self._json_path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, self._json_path)
+            return True
+        except OSError as exc:
+            _LOGGER.warning(
+                "Nie udało się zapisać lokalnego pliku JSON %s: %s",
+                self._json_path,
+                exc,
+            )
+            # nie zostawiamy po sobie niedokończonego pliku tymczasowego
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
 
-    async def _load_etag(self) -> str | None:
+    def _load_etag(self) -> str | None:
         """Wczytaj ETag z pliku .etag."""
+        try:
+            with open(self._etag_path, "r", encoding="utf-8") as f:
+                etag = f.read().strip()
+                return etag or None
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            _LOGGER.warning(
+                "Nie udało się odczytać pliku ETag %s: %s",
+                self._etag_path,
+                exc,
+            )
+            return None
 
-        def _load() -> str | None:
-            if not os.path.exists(self._etag_path):
-                return None
-            try:
-                with open(self._etag_path, "r", encoding="utf-8") as f:
-                    etag = f.read().strip()
-                    return etag or None
-            except OSError as exc:
-                _LOGGER.warning(
-                    "Nie udało się odczytać pliku ETag %s: %s",
-                    self._etag_path,
-                    exc,
-                )
-                return None
-
-        return await self.hass.async_add_executor_job(_load)
+    def _save_etag(self, etag: str | None) -> None:
+        """Zapisz ETag do pliku .etag.
 
-    async def _save_etag(self, etag: str | None) -> None:
-        """Zapisz ETag do pliku .etag."""
+        Bez ETagu usuwamy stary plik – inaczej następne If-None-Match
+        wskazywałoby na wcześniejszą wersję danych niż ta zapisana w JSON.
+        """
         if not etag:
-            return
-
-        def _save() -> None:
             try:
-                with open(self._etag_path, "w", encoding="utf-8") as f:
-                    f.write(etag)
+                os.remove(self._etag_path)
+            except FileNotFoundError:
+                pass
             except OSError as exc:
                 _LOGGER.warning(
-                    "Nie udało się zapisać pliku ETag %s: %s",
+                    "Nie udało się usunąć nieaktualnego pliku ETag %s: %s",
                     self._etag_path,
                     exc,
                 )
+            return
+        try:
+            with open(self._etag_path, "w", encoding="utf-8") as f:
+                f.write(etag)
+        except OSError as exc:
+            _LOGGER.warning(
+                "Nie udało się zapisać pliku ETag %s: %s",
+                self._etag_path,
+                exc,
+            )
 
-        await self.hass.async_add_executor_job(_save)
+    def _load_cache(self) -> Tuple[Any | None, str | None]:
+        """Wczytaj (surowy JSON, ETag) w jednym przejściu przez executor.
 
-    async def clear_cache(self) -> None:
-        """Usuń lokalny cache (JSON + ETag) i wymuś pełne odświeżenie danych."""
-        import os
+        ETag ma sens tylko wtedy, gdy mamy plik, na którym można pracować po 304.
+        """
+        raw = self._load_raw_json()
+        if raw is None:
+            return None, None
+        return raw, self._load_etag()
 
-        removed = []
+    def _save_cache(self, processed: Dict[str, Dict[str, Any]], etag: str | None) -> None:
+        """Zapisz legacy JSON i ETag w jednym przejściu przez executor.
+
+        Listę w starym formacie budujemy dopiero tutaj – tylko po świeżym
+        pobraniu (200), a nie przy każdej aktualizacji. ETag zapisujemy tylko
+        razem z udanym zapisem JSON – inaczej 304 trzymałoby nas przy starym
+        (albo brakującym) pliku aż do zmiany danych na serwerze.
+        """
+        saved = self._save_raw_json(_processed_to_legacy(processed))
+        self._save_etag(etag if saved else None)
 
-        for path in (self._json_path, self._etag_path):
+    def _remove_cache(self) -> List[str]:
+        """Usuń pliki cache; zwróć listę faktycznie usuniętych ścieżek."""
+        removed = []
+        for path in (self._json_path, f"{self._json_path}.tmp", self._etag_path):
             try:
-                if os.path.exists(path):
-                    os.remove(path)
-                    removed.append(path)
+                os.remove(path)
+                removed.append(path)
+            except FileNotFoundError:
+                continue
             except OSError as exc:
                 _LOGGER.warning("PGK Słupsk – nie udało się usunąć %s: %s", path, exc)
+        return removed
+
+    async def clear_cache(self) -> None:
+        """Usuń lokalny cache (JSON + ETag) i wymuś pełne odświeżenie danych."""
+        self._raw_cache = None
+        removed = await self.hass.async_add_executor_job(self._remove_cache)
 
         if removed:
             _LOGGER.info("PGK Słupsk – usunięto cache: %s", removed)
@@ -529,15 +769,16 @@ class PGKSlupskCoordinator(DataUpdateCoordinator[Dict[str, Dict[str, Any]]]):
         Nowe API:
         * GET strony z nagłówkami RSC (Accept: text/x-component, RSC: 1)
         * wyciągamy scheduleData z payloadu (Flight)
-        * konwertujemy do "starego" formatu JSON (lista obiektów)
+        * jednym przejściem budujemy słownik dla sensorów
 
         Cache:
-        * zapisujemy legacy JSON do pgk_slupsk_<entry_id>.json
+        * zapisujemy legacy JSON (lista obiektów) do pgk_slupsk_<entry_id>.json,
+          a ETag do .etag
+        * mając lokalny plik wysyłamy If-None-Match; 304 => pracujemy na pliku
         * w razie błędu sieci/parsowania używamy lokalnego pliku (jeśli jest)
         """
 
-        local_raw = await self._load_raw_json()
-        session = async_get_clientsession(self.hass)
+        local_raw, etag = await self.hass.async_add_executor_job(self._load_cache)
 
         url = _build_rsc_url(self.customer_type, self.region, self.location)
         headers: Dict[str, str] = {
@@ -547,26 +788,41 @@ class PGKSlupskCoordinator(DataUpdateCoordinator[Dict[str, Dict[str, Any]]]):
             "Referer": f"{BASE_SITE}{PATH}",
         }
 
+        # _load_cache zwraca ETag tylko wtedy, gdy jest też lokalny plik
+        if etag:
+            headers["If-None-Match"] = etag
+
         raw_data: Any | None = None
+        processed_data: Dict[str, Dict[str, Any]] | None = None
 
         try:
-            async with session.get(url, headers=headers, timeout=30) as response:
+            async with self._session.get(
+                url, headers=headers, timeout=REQUEST_TIMEOUT
+            ) as response:
                 status = response.status
-                if status != 200:
+                if status == 304:
+                    _LOGGER.debug(
+                        "PGK Słupsk - harmonogram bez zmian (304), używam pliku %s",
+                        self._json_path,
+                    )
+                    raw_data = local_raw
+                elif status != 200:
                     raise UpdateFailed(f"Nieprawidłowy kod HTTP z PGK: {status}")
-
-                rsc_text = await response.text()
-                schedule_data = _extract_schedule_data_from_rsc(rsc_text)
-                raw_data = _convert_schedule_to_legacy(schedule_data)
-
-                # zapis legacy JSON do pliku
-                await self._save_raw_json(raw_data)
-                _LOGGER.info(
-                    "PGK Słupsk - dane odświeżone (RSC) region='%s' location='%s' entries=%s",
-                    self.region,
-                    self.location,
-                    len(raw_data) if isinstance(raw_data, list) else "?",
-                )
+                else:
+                    body = await response.read()
+                    schedule_data = _extract_schedule_data_from_rsc(body)
+                    processed_data = _convert_schedule_to_processed(schedule_data)
+
+                    # zapis legacy JSON i ETag do plików
+                    await self.hass.async_add_executor_job(
+                        self._save_cache, processed_data, response.headers.get("ETag")
+                    )
+                    _LOGGER.info(
+                        "PGK Słupsk - dane odświeżone (RSC) region='%s' location='%s' fractions=%s",
+                        self.region,
+                        self.location,
+                        len(processed_data),
+                    )
 
         except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, UpdateFailed) as err:
             _LOGGER.error("Błąd podczas pobierania/parsu RSC PGK Słupsk: %s", err)
@@ -579,16 +835,23 @@ class PGKSlupskCoordinator(DataUpdateCoordinator[Dict[str, Dict[str, Any]]]):
             else:
                 raise UpdateFailed(f"Błąd podczas aktualizacji danych: {err}") from err
 
-        if raw_data is None:
-            raise UpdateFailed("Brak danych surowych po próbie pobrania i wczytania z pliku")
+        if processed_data is None:
+            # 304 albo błąd API – przetwarzamy legacy JSON z pliku
+            if raw_data is None:
+                raise UpdateFailed("Brak danych surowych po próbie pobrania i wczytania z pliku")
+            processed_data = self._process_raw_data(raw_data)
 
-        processed_data = self._process_raw_data(raw_data)
+        _attach_date_objs(processed_data)
+        _attach_display_info(processed_data)
+        self.by_date = _build_date_index(processed_data)
+        now = dt_util.now()
+        self._set_today(now.date())
+        self.data_updated = _format_timestamp(now)
 
         _LOGGER.debug("Przetworzone dane z API: %s", processed_data)
 
-        # Aktualizacja danych w koordynatorze – to automatycznie powiadomi encje
-        self.async_set_updated_data(processed_data)
-
+        # Zwrócone dane trafiają do self.data; encje zostaną powiadomione
+        # tylko wtedy, gdy różnią się od poprzednich (always_update=False)
         return processed_data
 
     # -------------------------------------------------------------------------
@@ -625,18 +888,22 @@ class PGKSlupskCoordinator(DataUpdateCoordinator[Dict[str, Dict[str, Any]]]):
                     "TypOdpadu": entry.get("TypOdpadu"),
                     "Kolor": entry.get("Kolor"),
                     "Daty": [],
-                    "Updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 }
 
-            # W oryginale: entry["Data"] – zostawiamy jak było
+            # W oryginale: entry["Data"] – zostawiamy jak było.
+            # Plik jest posortowany po dacie, więc duplikaty są obok siebie.
             dt = entry.get("Data")
             if isinstance(dt, str):
-                processed_data[waste_type_id]["Daty"].append(dt)
+                dates = processed_data[waste_type_id]["Daty"]
+                if not dates or dates[-1] != dt:
+                    dates.append(dt)
 
-        # Sortujemy daty i usuwamy duplikaty
-        for wt_id, wt_data in processed_data.items():
-            dates = sorted(set(wt_data.get("Daty", [])))
-            wt_data["Daty"] = dates
+        # Daty są już posortowane i bez duplikatów; sortujemy tylko, gdyby
+        # plik miał inną kolejność (jedno liniowe sprawdzenie na typ)
+        for wt_data in processed_data.values():
+            dates = wt_data["Daty"]
+            if any(b <= a for a, b in zip(dates, islice(dates, 1, None))):
+                wt_data["Daty"] = sorted(set(dates))
 
         return processed_data
 
@@ -658,7 +925,6 @@ class PGKSlupskSensor(CoordinatorEntity, SensorEntity):
         self._waste_type_id = waste_type_id
         self._waste_data = waste_data  # pełne dane z koordynatora
         self._integration_name = integration_name
-        self._hass = hass
         self._entry_id = entry_id
         
         self._attr_device_info = DeviceInfo(
@@ -670,116 +936,92 @@ class PGKSlupskSensor(CoordinatorEntity, SensorEntity):
         )
 
 
-        waste_info = WASTE_TYPES.get(waste_type_id, {})
-        self._name = f"{waste_info.get('name', waste_data['TypOdpadu'])}"
-        self._icon = waste_info.get("icon", "mdi:trash-can")
+        # nazwa i ikona rozwiązane raz w koordynatorze
+        self._attr_name = waste_data["name"]
+        self._attr_icon = waste_data["icon"]
         self._color = waste_data["Kolor"]
-        self._updated = waste_data["Updated"]
+        self._updated = coordinator.data_updated
 
         # wszystkie daty z API -> od razu czyścimy do "od dziś wzwyż"
-        today = datetime.now().date()
-        cleaned_dates: list[str] = []
-        for d_str in waste_data["Daty"]:
-            try:
-                d_obj = datetime.strptime(d_str, "%Y-%m-%d").date()
-            except ValueError:
-                continue
-            if d_obj >= today:
-                cleaned_dates.append(d_str)
-        self._dates = sorted(set(cleaned_dates))
+        self._dates: list[str] = []
+        self._parsed_dates: list[date] = []
+        self._set_dates(waste_data, coordinator.today)
 
         # znacznik ostatniego przeliczenia sensora (nie API)
-        self._refreshed = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._refreshed = coordinator.refreshed
+
+        # wynik ostatniego przeliczenia – czy jest co zapisywać do HA
+        self._snapshot: tuple | None = None
 
         # Stabilne unique_id – NA TYM opiera się brak duplikatów przy reload
-        self._unique_id = f"{entry_id}_waste_{waste_type_id}"
+        self._attr_unique_id = f"{entry_id}_waste_{waste_type_id}"
 
         self.entity_id = generate_entity_id(
             "sensor.{}",
-            f"pgk_slupsk_{self._integration_name}_{self._name}",
-            hass=self._hass,
+            f"pgk_slupsk_{self._integration_name}_{self._attr_name}",
+            hass=hass,
         )
 
-    @property
-    def name(self) -> str:
-        return self._name
+        # stan i atrybuty liczymy od razu – HA czyta je potem bez przeliczania
+        self._update_state()
 
-    @property
-    def unique_id(self) -> str:
-        return self._unique_id
+    def _set_dates(self, waste_data: Dict[str, Any], today: date) -> None:
+        """Zostaw dzisiejsze i przyszłe daty (już sparsowane w koordynatorze)."""
+        date_objs: List[date] = waste_data["DatyObj"]
+        idx = bisect.bisect_left(date_objs, today)
+        self._parsed_dates = date_objs[idx:]
+        self._dates = waste_data["Daty"][idx:]
 
-    def _get_next_date(self):
-        """Zwróć (najbliższa_data_datetime, days_diff) ignorując daty z przeszłości."""
-        if not self._dates:
-            return None, None
-
-        today = datetime.now().date()
-        candidates: List[date] = []
-
-        for d_str in self._dates:
-            try:
-                d_obj = datetime.strptime(d_str, "%Y-%m-%d").date()
-            except ValueError:
-                continue
-            if d_obj >= today:
-                candidates.append(d_obj)
-
-        if not candidates:
-            return None, None
-
-        next_date = min(candidates)
-        days_diff = (next_date - today).days
-        return next_date, days_diff
-
-    @property
-    def state(self):
-        """Zwróć stan sensora jako opis najbliższego odbioru."""
-        next_date, days_diff = self._get_next_date()
-
-        if next_date is not None and days_diff is not None:
-            weekday_name = DAYS_TRANSLATION[next_date.weekday()]
-            if days_diff == 0:
-                _LOGGER.debug("Sensor %s - stan: dziś", self.name)
-                return "dziś"
-            if days_diff == 1:
-                _LOGGER.debug("Sensor %s - stan: jutro", self.name)
-                return "jutro"
-            if days_diff == 2:
-                _LOGGER.debug(
-                    "Sensor %s - stan: %s, pojutrze", self.name, weekday_name
-                )
-                return f"{weekday_name}, pojutrze"
-            if days_diff > 2:
-                _LOGGER.debug(
-                    "Sensor %s - stan: %s, za %s dni",
-                    self.name,
-                    weekday_name,
-                    days_diff,
-                )
-                return f"{weekday_name}, za {days_diff} dni"
+    def _sync_from_coordinator(self) -> None:
+        """Przepisz dane typu odpadu z koordynatora (bez odświeżania API)."""
+        waste_data = self.coordinator.data.get(self._waste_type_id, {})
 
-        _LOGGER.debug(
-            "Sensor %s - stan: brak danych (brak przyszłych dat)", self.name
-        )
-        return "unknown"
+        if waste_data:
+            # pełna synchronizacja z koordynatora
+            self._waste_data = waste_data
+            self._color = waste_data.get("Kolor", self._color)
+            self._updated = self.coordinator.data_updated
+
+            # daty z koordynatora – zostawiamy tylko dzisiejsze i przyszłe
+            self._set_dates(waste_data, self.coordinator.today)
+
+    def _update_state(self) -> None:
+        """Przelicz stan (opis najbliższego odbioru) i atrybuty sensora."""
+        today = self.coordinator.today
+        next_date: date | None = None
+        days_diff: int | None = None
+
+        idx = bisect.bisect_left(self._parsed_dates, today)
+        if idx < len(self._parsed_dates):
+            next_date = self._parsed_dates[idx]
+            days_diff = (next_date - today).days
+
+        if next_date is None or days_diff is None or days_diff < 0:
+            state = "unknown"
+        elif days_diff == 0:
+            state = "dziś"
+        elif days_diff == 1:
+            state = "jutro"
+        elif days_diff == 2:
+            state = f"{DAYS_TRANSLATION[next_date.weekday()]}, pojutrze"
+        else:
+            state = f"{DAYS_TRANSLATION[next_date.weekday()]}, za {days_diff} dni"
 
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        """Zwróć dodatkowe atrybuty sensora."""
-        next_date, days_diff = self._get_next_date()
-        next_date_str = next_date.strftime("%Y-%m-%d") if next_date is not None else None
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Sensor %s - stan: %s", self._attr_name, state)
 
-        # Normalizacja nazwy typu odpadu
-        t = self._waste_data["TypOdpadu"]
-        self._waste_data["TypOdpadu"] = t[0].upper() + t[1:].lower()
+        # Normalizacja nazwy typu odpadu (bez modyfikowania danych koordynatora)
+        t = self._waste_data["TypOdpadu"] or ""
+        waste_type = t[:1].upper() + t[1:].lower()
 
-        return {
-            "Waste type": self._waste_data["TypOdpadu"],
+        self._attr_native_value = state
+        self._attr_extra_state_attributes = {
+            "Waste type": waste_type,
             "Waste type (id)": self._waste_type_id,
             "Container color": self._color,
             # najbliższa przyszła / dzisiejsza data
-            "Date": next_date_str,
-            # lista wszystkich przyszłych (i dzisiejszej) dat – już oczyszczona w async_update
+            "Date": next_date.isoformat() if next_date is not None else None,
+            # lista wszystkich przyszłych (i dzisiejszej) dat
             "Dates": self._dates,
             "Days until pickup": days_diff,
             # czas ostatniego odświeżenia danych z API / pliku
@@ -788,47 +1030,49 @@ class PGKSlupskSensor(CoordinatorEntity, SensorEntity):
             "Refreshed": self._refreshed,
         }
 
-    @property
-    def icon(self) -> str:
-        return self._icon
-
-    async def async_update(self) -> None:
-        """Zaktualizuj dane sensora na podstawie danych z koordynatora.
+    def _refresh(self) -> bool:
+        """Przelicz sensor z danych koordynatora; True, gdy wynik się zmienił.
 
         Nie wywołujemy tutaj ponownie odświeżania koordynatora,
         tylko czytamy to, co już zostało pobrane.
         """
-        waste_data = self.coordinator.data.get(self._waste_type_id, {})
+        self._sync_from_coordinator()
 
-        if waste_data:
-            # pełna synchronizacja z koordynatora
-            self._waste_data = waste_data
-            self._color = waste_data.get("Kolor", self._color)
-            self._updated = waste_data.get("Updated", self._updated)
-
-            # daty z koordynatora (albo zostajemy przy dotychczasowych, jeśli brak)
-            raw_dates = waste_data.get("Daty", self._dates)
-
-            # czyścimy: zostawiamy tylko dzisiejsze i przyszłe daty
-            today = datetime.now().date()
-            cleaned_dates: list[str] = []
-            for d_str in raw_dates:
-                try:
-                    d_obj = datetime.strptime(d_str, "%Y-%m-%d").date()
-                except ValueError:
-                    continue
-                if d_obj >= today:
-                    cleaned_dates.append(d_str)
+        # znacznik czasu – kiedy sensor został realnie przeliczony
+        self._refreshed = self.coordinator.refreshed
+        self._update_state()
+
+        # sama zmiana "Refreshed" nie jest powodem do zapisu stanu,
+        # ale zmiana dostępności (sukces/błąd koordynatora) już tak
+        attrs = self._attr_extra_state_attributes
+        snapshot = (
+            self.available,
+            self._attr_native_value,
+            attrs["Date"],
+            attrs["Days until pickup"],
+            tuple(self._dates),
+            self._color,
+            self._updated,
+        )
+        changed = snapshot != self._snapshot
+        self._snapshot = snapshot
+        return changed
 
-            self._dates = sorted(set(cleaned_dates))
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Nowe dane albo północ – przelicz stan raz i zapisz go, jeśli się zmienił."""
+        if self._refresh() or self.coordinator.force_write:
+            self.async_write_ha_state()
 
-        # znacznik czasu – kiedy sensor został realnie przeliczony
-        self._refreshed = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    async def async_update(self) -> None:
+        """Zaktualizuj dane sensora na podstawie danych z koordynatora."""
+        self._refresh()
 
 
 class PGKSlupskDayBeforeSensor(CoordinatorEntity, SensorEntity):
     """Sensor dla odpadów, które mają być zabrane na następny dzień."""
     _attr_translation_key = "wtp_sensor"
+    _attr_icon = "mdi:calendar-check"
 
     def __init__(
         self,
@@ -839,20 +1083,20 @@ class PGKSlupskDayBeforeSensor(CoordinatorEntity, SensorEntity):
     ) -> None:
         super().__init__(coordinator)
         self._integration_name = integration_name
-        self._hass = hass
         self._entry_id = entry_id
 
-        self._name = "Odpady do przygotowania"
+        self._attr_name = "Odpady do przygotowania"
         self.entity_id = generate_entity_id(
             "sensor.{}",
             f"pgk_slupsk_{integration_name}_wtp",
-            hass=self._hass,
+            hass=hass,
         )
 
         # Stabilne unique_id: jeden sensor "co jutro" na entry
-        self._unique_id = f"{entry_id}_waste_tomorrow"
-        self._refreshed = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
+        self._attr_unique_id = f"{entry_id}{WASTE_TOMORROW_SUFFIX}"
+        self._refreshed = coordinator.refreshed
+        self._snapshot: tuple | None = None
+
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, f"{entry_id}::service")},
             name=DEVICE_NAME,
@@ -861,49 +1105,45 @@ class PGKSlupskDayBeforeSensor(CoordinatorEntity, SensorEntity):
             entry_type=DeviceEntryType.SERVICE,
         )
 
-    @property
-    def name(self) -> str:
-        return self._name
-
-    @property
-    def unique_id(self) -> str:
-        return self._unique_id
+        self._update_state()
 
-    @property
-    def state(self) -> str:
-        """Zwróć listę typów odpadów do zabrania na następny dzień."""
+    def _update_state(self) -> None:
+        """Przelicz listę typów odpadów do zabrania na następny dzień."""
         if not self.coordinator.data:
-            return "none"
-
-        next_day = datetime.now() + timedelta(days=1)
-        waste_types_for_next_day: List[str] = []
-
-        for waste_type_id, waste_data in self.coordinator.data.items():
-            for waste_date in waste_data["Daty"]:
-                waste_date_obj = datetime.strptime(waste_date, "%Y-%m-%d")
-                if waste_date_obj.date() == next_day.date():
-                    waste_info = WASTE_TYPES.get(waste_type_id, {})
-                    waste_types_for_next_day.append(
-                        waste_info.get("name", waste_data["TypOdpadu"])
-                    )
+            state = "none"
+        else:
+            waste_types_for_next_day = self.coordinator.by_date.get(
+                self.coordinator.tomorrow, []
+            )
 
-        _LOGGER.debug(
-            "Sensor Odpady do przygotowania - dane na jutro: %s",
-            waste_types_for_next_day,
-        )
-        return ", ".join(waste_types_for_next_day) if waste_types_for_next_day else "brak"
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "Sensor Odpady do przygotowania - dane na jutro: %s",
+                    waste_types_for_next_day,
+                )
+            state = ", ".join(waste_types_for_next_day) if waste_types_for_next_day else "brak"
 
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        """Atrybuty pomocnicze."""
-        return {
+        self._attr_native_value = state
+        self._attr_extra_state_attributes = {
             "Refreshed": self._refreshed
         }
 
-    @property
-    def icon(self) -> str:
-        return "mdi:calendar-check"
+    def _refresh(self) -> bool:
+        """Przelicz stan sensora; True, gdy wynik albo dostępność się zmieniły."""
+        self._refreshed = self.coordinator.refreshed
+        self._update_state()
+
+        snapshot = (self.available, self._attr_native_value)
+        changed = snapshot != self._snapshot
+        self._snapshot = snapshot
+        return changed
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Nowe dane albo północ – przelicz stan raz i zapisz go, jeśli się zmienił."""
+        if self._refresh() or self.coordinator.force_write:
+            self.async_write_ha_state()
 
     async def async_update(self) -> None:
-        """Aktualizuj stan sensora (logika stanu jest dynamiczna)."""
-        self._refreshed = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        """Aktualizuj stan sensora (przeliczany przy odświeżaniu, nie przy odczycie)."""
+        self._refresh()